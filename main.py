@@ -1,24 +1,52 @@
+import sys
+
+# Use ISA-L's SIMD-accelerated DEFLATE/CRC32 for zipfile when available.
+# isal_zlib is API-compatible with zlib and 2-4x faster on the compress path.
+# Must be aliased before zipfile is imported (zipfile binds zlib at import).
+try:
+    from isal import isal_zlib
+
+    sys.modules.setdefault("zlib", isal_zlib)
+except ImportError:
+    pass
+
 from fastapi import FastAPI, Request, HTTPException, Form, UploadFile, File
+from fastapi.responses import Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse, StreamingResponse, JSONResponse
+from fastapi.responses import (
+    StreamingResponse,
+    ORJSONResponse,
+    HTMLResponse,
+    FileResponse,
+)
 from pathlib import Path
 from typing import List, Optional
+import aiofiles
+import os
+import queue
 import shutil
 import zipfile
 import io
 from datetime import datetime, timedelta
+from functools import lru_cache
+import orjson
 import re
-import ffmpeg
-import tempfile
+import time
 import asyncio
+from operator import itemgetter
+from urllib.parse import quote
+from markupsafe import escape
 from concurrent.futures import ThreadPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import logging
 from contextlib import asynccontextmanager
 
+from merge_helper import merge_videos_fast, merge_videos_sync
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -29,7 +57,12 @@ logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 
 # Thread pool for running ffmpeg in background
-executor = ThreadPoolExecutor(max_workers=2)
+MERGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="ffmpeg")
+
+# At most one merge at a time - concurrent libx264 encodes (scheduled job
+# colliding with the API endpoint) thrash the CPU and help nobody
+MERGE_LOCK = asyncio.Semaphore(1)
 
 
 @asynccontextmanager
@@ -46,6 +79,11 @@ async def lifespan(app: FastAPI):
         id="merge_today_videos",
         name="Merge Today's Videos",
         replace_existing=True,
+        # Never let a slow merge overlap the next trigger; collapse missed
+        # runs into one and allow a 5-minute late start after downtime
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=300,
     )
 
     scheduler.start()
@@ -60,7 +98,7 @@ async def lifespan(app: FastAPI):
 
 
 # Create FastAPI app with lifespan
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS to allow all origins
 app.add_middleware(
@@ -79,91 +117,99 @@ templates = Jinja2Templates(directory="templates")
 
 STATICFILES_DIR = Path("n8n_ffmpeg")
 
+# Resolved base directory, computed once - avoids a realpath syscall chain
+# on every request's security check
+STATICFILES_ROOT = str(STATICFILES_DIR.resolve())
 
-# Scheduled job function
-async def merge_today_videos_job():
+YT_DIR = Path("yt")
+YT_ROOT = str(YT_DIR.resolve())
+
+
+def _safe_join(root: str, user_path: str) -> Optional[Path]:
     """
-    Scheduled job that runs at 8 AM to merge videos from the last 24 hours.
-    This checks for files with datetime in format: YYYY-MM-DD_HH-MM-SS
-    Example: xxx_xxx_2026-02-03_15-05-36.mp4
+    Join a user-supplied path onto root and validate it with pure string
+    normalization - no realpath syscall chain per component. Symlinks
+    inside the tree are trusted (we never create any).
 
-    If run at 2026-02-04 08:00:00, it will find files from:
-    2026-02-03 07:59:00 to 2026-02-04 08:01:00
+    Returns the joined Path, or None if the result would escape root.
+    Comparing against root + separator avoids the prefix-confusion hole
+    where a sibling dir like "n8n_ffmpeg_evil" passes a bare prefix check.
     """
-    try:
-        logger.info(
-            "Starting scheduled video merge job (24-hour news cycle)...")
+    norm = os.path.normpath(os.path.join(root, user_path))
+    if norm == root or norm.startswith(root + os.sep):
+        return Path(norm)
+    return None
 
-        # Get current time
-        current_time = datetime.now()
 
-        # Calculate 24 hours ago (with 1 minute buffer on each side)
-        time_24h_ago = current_time - timedelta(hours=24, minutes=1)
-        time_now_plus_buffer = current_time + timedelta(minutes=1)
+# Extensions that are already compressed - deflating these burns CPU for ~0% gain
+PRECOMPRESSED_EXTS = frozenset(
+    {".mp4", ".mkv", ".webm", ".avi", ".mov", ".flv", ".wmv",
+     ".jpg", ".jpeg", ".png", ".mp3", ".m4a", ".zip", ".gz"}
+)
 
-        logger.info(
-            f"Looking for videos from {time_24h_ago.strftime('%Y-%m-%d %H:%M:%S')} to {time_now_plus_buffer.strftime('%Y-%m-%d %H:%M:%S')}")
+# Pattern to match datetime in filename (YYYY-MM-DD_HH-MM-SS), compiled once
+DATETIME_RE = re.compile(r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})")
 
-        # Pattern to match datetime in filename (YYYY-MM-DD_HH-MM-SS)
-        datetime_pattern = re.compile(
-            r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})")
+# Video file extensions eligible for merging, as a tuple so filters can
+# use str.endswith (one C call, no per-file suffix string allocation)
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".flv", ".wmv", ".webm")
 
-        # Get all video files from the last 24 hours
-        if not STATICFILES_DIR.exists():
-            logger.error("n8n_ffmpeg folder not found")
-            return
-
-        video_files = []
-        video_extensions = {".mp4", ".avi", ".mov",
-                            ".mkv", ".flv", ".wmv", ".webm"}
-
-        # Find all video files from the last 24 hours
-        for item in STATICFILES_DIR.rglob("*"):
-            if item.is_file() and item.suffix.lower() in video_extensions:
-                match = datetime_pattern.search(item.name)
-                if match:
-                    try:
-                        # Extract date and time from filename
-                        date_str = match.group(1)  # YYYY-MM-DD
-                        time_str = match.group(2)  # HH-MM-SS
-
-                        # Convert to datetime object
-                        file_datetime_str = f"{date_str} {time_str.replace('-', ':')}"
-                        file_datetime = datetime.strptime(
-                            file_datetime_str, "%Y-%m-%d %H:%M:%S")
-
-                        # Check if file is within the 24-hour window
-                        if time_24h_ago <= file_datetime <= time_now_plus_buffer:
-                            video_files.append(item)
-                            logger.debug(
-                                f"Found video: {item.name} ({file_datetime})")
-                    except ValueError as e:
-                        logger.warning(
-                            f"Could not parse datetime from filename: {item.name} - {e}")
-                        continue
-
-        if not video_files:
-            logger.warning(f"No video files found for the last 24 hours")
-            return
-
-        # Sort files by name to ensure consistent order
-        video_files.sort(key=lambda x: x.name)
+# Cap on upload size for /yt-upload - rejected up front from Content-Length
+MAX_UPLOAD_BYTES = 20 * (1 << 30)  # 20 GB
 
-        logger.info(
-            f"Found {len(video_files)} videos to merge for the last 24 hours")
 
-        # Generate output filename with current date
-        output_filename = f"hotnews_{current_time.strftime('%Y-%m-%d')}.mp4"
-        output_path = STATICFILES_DIR / output_filename
+async def _merge_last_24h(current_time: datetime) -> dict:
+    """
+    Scan the 24-hour window ending at current_time and merge every video
+    found into hotnews_<date>.mp4, holding MERGE_LOCK across the ffmpeg
+    work. Shared by the scheduled job and the merge endpoint.
+
+    Returns the merge result dict, extended with "video_files" and
+    "time_range" on success. Failures carry a "not_found" flag when the
+    problem is a missing folder or an empty window, so callers can
+    distinguish 404-style conditions from real merge errors.
+    """
+    # Calculate 24 hours ago (with 1 minute buffer on each side)
+    time_24h_ago = current_time - timedelta(hours=24, minutes=1)
+    time_now_plus_buffer = current_time + timedelta(minutes=1)
 
-        # Try FAST merge first (codec copy - no re-encoding)
-        # This is 10-50x faster but only works if all videos have same format
-        loop = asyncio.get_event_loop()
-        logger.info(
-            f"Attempting FAST merge (codec copy) for {len(video_files)} videos..."
-        )
+    logger.info(
+        f"Looking for videos from {time_24h_ago.strftime('%Y-%m-%d %H:%M:%S')} to {time_now_plus_buffer.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    if not STATICFILES_DIR.exists():
+        return {
+            "status": "error",
+            "not_found": True,
+            "message": "n8n_ffmpeg folder not found",
+        }
+
+    # Find all video files from the last 24 hours (scan off-loop)
+    video_files = await run_in_threadpool(
+        _find_window_videos, time_24h_ago, time_now_plus_buffer)
+
+    if not video_files:
+        return {
+            "status": "error",
+            "not_found": True,
+            "message": f"No video files found for the last 24 hours (from {time_24h_ago.strftime('%Y-%m-%d %H:%M:%S')} to {time_now_plus_buffer.strftime('%Y-%m-%d %H:%M:%S')})",
+        }
+
+    logger.info(
+        f"Found {len(video_files)} videos to merge for the last 24 hours")
+
+    # Generate output filename with current date
+    output_filename = f"hotnews_{current_time.strftime('%Y-%m-%d')}.mp4"
+    output_path = STATICFILES_DIR / output_filename
+
+    # Try FAST merge first (codec copy - no re-encoding)
+    # This is 10-50x faster but only works if all videos have same format
+    loop = asyncio.get_running_loop()
+    logger.info(
+        f"Attempting FAST merge (codec copy) for {len(video_files)} videos..."
+    )
+    async with MERGE_LOCK:
         result = await loop.run_in_executor(
-            executor, merge_videos_fast, video_files, output_path
+            MERGE_EXECUTOR, merge_videos_fast, video_files, output_path
         )
 
         # If fast merge failed, fall back to slow merge with re-encoding
@@ -171,12 +217,37 @@ async def merge_today_videos_job():
             logger.warning(f"Fast merge failed: {result['message']}")
             logger.info("Falling back to slow merge with re-encoding...")
             result = await loop.run_in_executor(
-                executor, merge_videos_sync, video_files, output_path
+                MERGE_EXECUTOR, merge_videos_sync, video_files, output_path
             )
 
+    if result["status"] == "success":
+        result["video_files"] = video_files
+        result["time_range"] = {
+            "from": time_24h_ago.strftime("%Y-%m-%d %H:%M:%S"),
+            "to": time_now_plus_buffer.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    return result
+
+
+# Scheduled job function
+async def merge_today_videos_job():
+    """
+    Scheduled job that runs at 8 AM to merge videos from the last 24 hours.
+    This checks for files with datetime in format: YYYY-MM-DD_HH-MM-SS
+    Example: xxx_xxx_2026-02-03_15-05-36.mp4
+
+    If run at 2026-02-04 08:00:00, it will find files from:
+    2026-02-03 07:59:00 to 2026-02-04 08:01:00
+    """
+    try:
+        logger.info(
+            "Starting scheduled video merge job (24-hour news cycle)...")
+
+        result = await _merge_last_24h(datetime.now())
+
         if result["status"] == "success":
             logger.info(
-                f"✅ Successfully merged {len(video_files)} videos into {output_filename}"
+                f"✅ Successfully merged {len(result['video_files'])} videos into {result['output_file']}"
             )
             logger.info(f"   Output size: {result['output_size_mb']} MB")
             logger.info(f"   Method: {result['message']}")
@@ -188,34 +259,249 @@ async def merge_today_videos_job():
             f"❌ Error in scheduled merge job: {str(e)}", exc_info=True)
 
 
+def _scan_dir(directory: Path) -> List[dict]:
+    """
+    Build the file listing for a directory (blocking filesystem calls).
+    Run this in a threadpool so it doesn't stall the event loop on large folders.
+
+    Uses os.scandir so is_dir/is_file/stat come from the cached DirEntry
+    (one syscall per entry instead of three).
+    """
+    at_root = directory == STATICFILES_DIR
+    items = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            # follow_symlinks=False answers from the dirent type with no
+            # stat syscall at all (the tree contains no symlinks)
+            is_dir = entry.is_dir(follow_symlinks=False)
+            items.append(
+                {
+                    "name": entry.name,
+                    "type": "📁" if is_dir else "📄",
+                    "is_dir": is_dir,
+                    # Raw byte count - the template formats only rendered rows
+                    "size": 0 if is_dir else entry.stat().st_size,
+                    # Subfolder paths come from _safe_join and are
+                    # absolute, so relativize against the resolved root
+                    "path": entry.name
+                    if at_root
+                    else str(Path(entry.path).relative_to(STATICFILES_ROOT)),
+                }
+            )
+    return items
+
+
+# Precompiled table-row template. Rendering rows with one str.format call
+# per entry (values escaped via markupsafe) is several times cheaper than
+# Jinja's per-row bytecode dispatch for large directories.
+_ROW_TMPL = """<tr class="hover:bg-gray-50 transition file-row">
+  <td class="px-6 py-4">
+    <input type="checkbox" name="selected_files" value="{path}"
+      class="file-checkbox w-4 h-4 text-blue-600 rounded focus:ring-2 focus:ring-blue-500"
+      onchange="updateDeleteButton()" />
+  </td>
+  <td class="px-6 py-4 whitespace-nowrap">
+    <div class="flex items-center">
+      <span class="text-2xl mr-3">{type}</span>
+      <span class="text-sm font-medium text-gray-900 file-name">{name}</span>
+    </div>
+  </td>
+  <td class="px-6 py-4 whitespace-nowrap">{badge}</td>
+  <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{size}</td>
+  <td class="px-6 py-4 whitespace-nowrap text-sm font-medium space-x-3">
+    {action}
+    <button type="button" onclick="deleteSingle('{path}', '{name}')"
+      class="text-red-600 hover:text-red-900 transition">
+      Delete
+    </button>
+  </td>
+</tr>
+""".format
+
+_DIR_BADGE = (
+    '<span class="px-2 inline-flex text-xs leading-5 font-semibold '
+    'rounded-full bg-blue-100 text-blue-800">Folder</span>'
+)
+_FILE_BADGE = (
+    '<span class="px-2 inline-flex text-xs leading-5 font-semibold '
+    'rounded-full bg-green-100 text-green-800">File</span>'
+)
+
+
+def _render_rows(items: List[dict]) -> str:
+    """Render the table rows for the browse pages outside of Jinja."""
+    rows = []
+    for item in items:
+        raw_path = item["path"]
+        if item["is_dir"]:
+            badge = _DIR_BADGE
+            size = "-"
+            action = (
+                f'<a href="/folder/{quote(raw_path)}" '
+                'class="text-blue-600 hover:text-blue-900 transition">Open</a>'
+            )
+        else:
+            badge = _FILE_BADGE
+            size = f"{item['size'] / 1024:.2f} KB"
+            action = (
+                f'<a href="/static/{quote(raw_path)}" target="_blank" '
+                'class="text-green-600 hover:text-green-900 transition">View</a>'
+            )
+
+        rows.append(
+            _ROW_TMPL(
+                path=escape(raw_path),
+                name=escape(item["name"]),
+                type=item["type"],
+                badge=badge,
+                size=size,
+                action=action,
+            )
+        )
+    return "".join(rows)
+
+
+# Rendered browse-page cache: folder path -> (dir mtime_ns, html bytes).
+# Directory mtime bumps whenever an entry is added or removed, so a stale
+# page can never be served; repeat views skip the scan and render entirely.
+_PAGE_CACHE: dict = {}
+
+
+def _render_listing(directory: Path, title: str, current_path: Optional[str]) -> bytes:
+    """
+    Render the file listing page for a directory (blocking filesystem calls).
+    Returns cached HTML while the directory mtime is unchanged.
+    """
+    key = str(directory)
+    mtime_ns = os.stat(directory).st_mtime_ns
+
+    cached = _PAGE_CACHE.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    items = sorted(
+        _scan_dir(directory), key=lambda x: (not x["is_dir"], x["name"]))
+    html = (
+        templates.get_template("file_list.html")
+        .render(
+            items=items,
+            rows_html=_render_rows(items),
+            title=title,
+            current_path=current_path,
+        )
+        .encode("utf-8")
+    )
+    _PAGE_CACHE[key] = (mtime_ns, html)
+    return html
+
+
+def _walk_files(root: Path):
+    """Yield DirEntry objects for every file under root (scandir-based rglob)."""
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _iter_window_files(time_from, time_to, extensions=None):
+    """
+    Yield (DirEntry, datetime) pairs for files under n8n_ffmpeg whose
+    filename datetime (YYYY-MM-DD_HH-MM-SS) falls inside the window.
+
+    scandir-based, so the type check and any later stat() reuse the cached
+    DirEntry instead of allocating a Path and re-stat-ing per file.
+    """
+    for entry in _walk_files(STATICFILES_DIR):
+        name = entry.name
+        if extensions is not None and not name.lower().endswith(extensions):
+            continue
+
+        match = DATETIME_RE.search(name)
+        if not match:
+            continue
+
+        try:
+            # Convert "YYYY-MM-DD" + "HH-MM-SS" to a datetime object
+            file_datetime = datetime.strptime(
+                f"{match.group(1)} {match.group(2).replace('-', ':')}",
+                "%Y-%m-%d %H:%M:%S",
+            )
+        except ValueError as e:
+            logger.warning(
+                f"Could not parse datetime from filename: {name} - {e}")
+            continue
+
+        # Check if file is within the window
+        if time_from <= file_datetime <= time_to:
+            yield entry, file_datetime
+
+
+def _find_window_videos(time_from, time_to) -> List[Path]:
+    """
+    Collect and sort the video files for a merge window (blocking scan).
+    Run this in a threadpool so the walk doesn't stall the event loop.
+    """
+    video_files = [
+        Path(entry.path)
+        for entry, _ in _iter_window_files(time_from, time_to, VIDEO_EXTS)
+    ]
+
+    # Sort files by name to ensure consistent order
+    video_files.sort(key=lambda x: x.name)
+    return video_files
+
+
+def _scan_yesterday(time_from, time_to, include_mtime: bool = True) -> List[dict]:
+    """
+    Collect file info for the last-24-hours listing (blocking scan).
+    Run this in a threadpool so the walk doesn't stall the event loop.
+    """
+    files_24h = []
+    staticfiles_str = str(STATICFILES_DIR)
+
+    for entry, file_datetime in _iter_window_files(time_from, time_to):
+        st = entry.stat()  # cached by the DirEntry - one syscall
+
+        info = {
+            "name": entry.name,
+            "path": os.path.relpath(
+                entry.path, staticfiles_str).replace("\\", "/"),
+            "datetime": file_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+            "size": st.st_size,
+            "size_kb": round(st.st_size / 1024, 2),
+            "size_mb": round(st.st_size / 1024 / 1024, 2),
+        }
+        if include_mtime:
+            # time.strftime on a struct_time skips the datetime object
+            # allocation - noticeably cheaper across thousands of entries
+            info["modified"] = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(st.st_mtime))
+        files_24h.append(info)
+
+    # Sort by filename
+    files_24h.sort(key=itemgetter("name"))
+    return files_24h
+
+
 @app.get("/")
 async def home(request: Request):
     """Home page with file listing"""
     try:
-        items = []
-        if STATICFILES_DIR.exists():
-            for item in STATICFILES_DIR.iterdir():
-                items.append(
-                    {
-                        "name": item.name,
-                        "type": "📁" if item.is_dir() else "📄",
-                        "is_dir": item.is_dir(),
-                        "size": f"{item.stat().st_size / 1024:.2f} KB"
-                        if item.is_file()
-                        else "-",
-                        "path": item.name,
-                    }
-                )
+        if not STATICFILES_DIR.exists():
+            html = templates.get_template("file_list.html").render(
+                items=[], rows_html="",
+                title="Static Files Browser", current_path=None
+            )
+            return HTMLResponse(html)
 
-        return templates.TemplateResponse(
-            "file_list.html",
-            {
-                "request": request,
-                "items": sorted(items, key=lambda x: (not x["is_dir"], x["name"])),
-                "title": "Static Files Browser",
-                "current_path": None,
-            },
+        html = await run_in_threadpool(
+            _render_listing, STATICFILES_DIR, "Static Files Browser", None
         )
+        return HTMLResponse(html)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -224,38 +510,18 @@ async def home(request: Request):
 async def browse_folder(request: Request, path: str):
     """Browse a specific folder"""
     try:
-        target_path = STATICFILES_DIR / path
-        target_path = target_path.resolve()
+        target_path = _safe_join(STATICFILES_ROOT, path)
 
-        if not str(target_path).startswith(str(STATICFILES_DIR.resolve())):
+        if target_path is None:
             raise HTTPException(status_code=403, detail="Access denied")
 
         if not target_path.exists() or not target_path.is_dir():
             raise HTTPException(status_code=404, detail="Folder not found")
 
-        items = []
-        for item in target_path.iterdir():
-            items.append(
-                {
-                    "name": item.name,
-                    "type": "📁" if item.is_dir() else "📄",
-                    "is_dir": item.is_dir(),
-                    "size": f"{item.stat().st_size / 1024:.2f} KB"
-                    if item.is_file()
-                    else "-",
-                    "path": str(item.relative_to(STATICFILES_DIR)),
-                }
-            )
-
-        return templates.TemplateResponse(
-            "file_list.html",
-            {
-                "request": request,
-                "items": sorted(items, key=lambda x: (not x["is_dir"], x["name"])),
-                "title": f"Browsing: {path}",
-                "current_path": path,
-            },
+        html = await run_in_threadpool(
+            _render_listing, target_path, f"Browsing: {path}", path
         )
+        return HTMLResponse(html)
     except HTTPException:
         raise
     except Exception as e:
@@ -266,25 +532,22 @@ async def browse_folder(request: Request, path: str):
 async def delete_item(path: str = Form(...)):
     """Delete a single file or folder"""
     try:
-        target_path = STATICFILES_DIR / path
-        target_path = target_path.resolve()
+        target_path = _safe_join(STATICFILES_ROOT, path)
 
-        if not str(target_path).startswith(str(STATICFILES_DIR.resolve())):
+        if target_path is None:
             raise HTTPException(status_code=403, detail="Access denied")
 
         if not target_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
 
         if target_path.is_dir():
-            shutil.rmtree(target_path)
+            await run_in_threadpool(shutil.rmtree, target_path)
         else:
-            target_path.unlink()
+            await run_in_threadpool(target_path.unlink)
 
-        parent = str(Path(path).parent)
-        if parent == ".":
-            return RedirectResponse(url="/", status_code=303)
-        else:
-            return RedirectResponse(url=f"/folder/{parent}", status_code=303)
+        # JSON acknowledgement - the client patches its UI, avoiding the
+        # redirect + full re-listing round-trip
+        return ORJSONResponse(content={"status": "success", "deleted": path})
 
     except HTTPException:
         raise
@@ -292,106 +555,276 @@ async def delete_item(path: str = Form(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _delete_one(file_path: str) -> Optional[str]:
+    """Delete a single path, returning an error message or None on success."""
+    try:
+        target_path = _safe_join(STATICFILES_ROOT, file_path)
+
+        if target_path is None:
+            return f"{file_path}: Access denied"
+
+        if not target_path.exists():
+            return f"{file_path}: Not found"
+
+        if target_path.is_dir():
+            shutil.rmtree(target_path)
+        else:
+            target_path.unlink()
+
+        return None
+
+    except Exception as e:
+        return f"{file_path}: {str(e)}"
+
+
+def _delete_paths(selected_files: List[str]) -> tuple:
+    """
+    Delete the given paths (blocking filesystem calls).
+    Deletions are fanned out across a threadpool - unlink/rmtree latency is
+    dominated by metadata I/O, so bulk selections scale with worker count.
+    """
+    with ThreadPoolExecutor(max_workers=min(16, len(selected_files))) as pool:
+        results = list(pool.map(_delete_one, selected_files))
+
+    errors = [error for error in results if error is not None]
+    deleted_count = len(results) - len(errors)
+
+    return deleted_count, errors
+
+
 @app.post("/delete-multiple")
 async def delete_multiple(request: Request, selected_files: List[str] = Form(...)):
     """Delete multiple selected files/folders"""
     try:
-        deleted_count = 0
-        errors = []
+        deleted_count, errors = await run_in_threadpool(
+            _delete_paths, selected_files)
 
-        for file_path in selected_files:
-            try:
-                target_path = STATICFILES_DIR / file_path
-                target_path = target_path.resolve()
+        # JSON acknowledgement - the client patches its UI, avoiding the
+        # redirect + full re-listing round-trip
+        return ORJSONResponse(
+            content={"status": "success",
+                     "deleted": deleted_count, "errors": errors}
+        )
 
-                if not str(target_path).startswith(str(STATICFILES_DIR.resolve())):
-                    errors.append(f"{file_path}: Access denied")
-                    continue
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-                if not target_path.exists():
-                    errors.append(f"{file_path}: Not found")
-                    continue
 
-                if target_path.is_dir():
-                    shutil.rmtree(target_path)
-                else:
-                    target_path.unlink()
+# Reusable output buffers for ZIP streaming. Pooling avoids re-growing a
+# fresh bytearray through every request's deflate output; buffers are
+# returned cleared but keep their allocated capacity.
+_ZIP_BUFFER_POOL: queue.LifoQueue = queue.LifoQueue(maxsize=4)
 
-                deleted_count += 1
 
-            except Exception as e:
-                errors.append(f"{file_path}: {str(e)}")
+class _ZipStream(io.RawIOBase):
+    """
+    Unseekable write target for ZipFile that hands finished bytes back
+    to the response generator instead of buffering the whole archive.
+    """
 
-        if selected_files:
-            parent = str(Path(selected_files[0]).parent)
-            redirect_url = "/" if parent == "." else f"/folder/{parent}"
-        else:
-            redirect_url = "/"
+    def __init__(self):
+        try:
+            self._buffer = _ZIP_BUFFER_POOL.get_nowait()
+        except queue.Empty:
+            self._buffer = bytearray()
 
-        return RedirectResponse(url=redirect_url, status_code=303)
+    def writable(self) -> bool:
+        return True
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+    def release(self) -> None:
+        """Return the internal buffer to the pool for the next request."""
+        self._buffer.clear()
+        try:
+            _ZIP_BUFFER_POOL.put_nowait(self._buffer)
+        except queue.Full:
+            pass
+        self._buffer = bytearray()
+
+
+def _zip_compress_type(path: Path) -> int:
+    """Skip deflate for already-compressed payloads (video/image/audio)."""
+    if path.suffix.lower() in PRECOMPRESSED_EXTS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+# Chunk size for copying files into the ZIP (1 MiB)
+ZIP_CHUNK_SIZE = 1 << 20
+
+
+def _zip_add_file(zip_file: zipfile.ZipFile, stream: "_ZipStream",
+                  target_path: Path, arcname: str, compresslevel: int):
+    """
+    Copy one file into the archive in 1 MiB chunks, yielding ZIP output as
+    it is produced. Keeps memory bounded for GB-sized videos; force_zip64
+    also lifts the 4 GiB per-entry cap.
+    """
+    info = zipfile.ZipInfo.from_file(target_path, arcname)
+    info.compress_type = _zip_compress_type(target_path)
+    # ZipFile.open takes the level from the ZipInfo, not from the
+    # compresslevel passed to the ZipFile constructor (only write/
+    # writestr read that) - without this the form field is a no-op
+    info._compresslevel = compresslevel
+
+    with open(target_path, "rb") as src, zip_file.open(
+        info, "w", force_zip64=True
+    ) as dst:
+        while chunk := src.read(ZIP_CHUNK_SIZE):
+            dst.write(chunk)
+            yield stream.drain()
+
+
+def _zip_generator(selected_files: List[str], compresslevel: int):
+    """
+    Yield ZIP archive chunks as they are produced (blocking filesystem calls).
+    StreamingResponse iterates sync generators in a threadpool, so memory
+    stays bounded by the size of one entry's compressed output.
+    """
+    stream = _ZipStream()
+
+    try:
+        yield from _zip_entries(stream, selected_files, compresslevel)
+    finally:
+        stream.release()
+
+
+def _zip_entries(stream: _ZipStream, selected_files: List[str], compresslevel: int):
+    # Archive default is STORED - batches are almost always video, and
+    # _zip_add_file opts individual entries back into DEFLATE when their
+    # suffix says the payload is actually compressible
+    with zipfile.ZipFile(
+        stream, "w", zipfile.ZIP_STORED,
+        allowZip64=True, compresslevel=compresslevel,
+    ) as zip_file:
+        for file_path in selected_files:
+            # Security check (string-level, no per-path realpath)
+            target_path = _safe_join(STATICFILES_ROOT, file_path)
+            if target_path is None:
+                continue
+
+            if not target_path.exists():
+                continue
+
+            # Add file or folder to ZIP
+            if target_path.is_file():
+                # Add single file
+                yield from _zip_add_file(
+                    zip_file, stream, target_path, file_path, compresslevel)
+            elif target_path.is_dir():
+                # Add all files in directory recursively
+                for item in target_path.rglob("*"):
+                    if item.is_file():
+                        # rglob on the absolute _safe_join result yields
+                        # absolute paths - relativize against the root
+                        arcname = str(item.relative_to(STATICFILES_ROOT))
+                        yield from _zip_add_file(
+                            zip_file, stream, item, arcname, compresslevel)
+
+    # Flush the central directory written on ZipFile close
+    yield stream.drain()
 
 
 @app.post("/download-multiple")
-async def download_multiple(selected_files: List[str] = Form(...)):
+async def download_multiple(
+    selected_files: List[str] = Form(...), compression: int = Form(1)
+):
     """Download multiple selected files/folders as a ZIP archive"""
     try:
         if not selected_files:
             raise HTTPException(status_code=400, detail="No files selected")
 
-        # Create an in-memory ZIP file
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            for file_path in selected_files:
-                target_path = STATICFILES_DIR / file_path
-                target_path = target_path.resolve()
-
-                # Security check
-                if not str(target_path).startswith(str(STATICFILES_DIR.resolve())):
-                    continue
-
-                if not target_path.exists():
-                    continue
-
-                # Add file or folder to ZIP
-                if target_path.is_file():
-                    # Add single file
-                    zip_file.write(target_path, arcname=file_path)
-                elif target_path.is_dir():
-                    # Add all files in directory recursively
-                    for item in target_path.rglob("*"):
-                        if item.is_file():
-                            arcname = str(item.relative_to(STATICFILES_DIR))
-                            zip_file.write(item, arcname=arcname)
-
-        # Prepare the ZIP for download
-        zip_buffer.seek(0)
-
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if not 0 <= compression <= 9:
+            raise HTTPException(
+                status_code=400, detail="compression must be between 0 and 9")
+
+        # Single-file fast path: FileResponse streams via sendfile(2) with
+        # zero user-space copies and no ZIP/deflate work at all
+        if len(selected_files) == 1:
+            target_path = _safe_join(STATICFILES_ROOT, selected_files[0])
+            if target_path is not None and target_path.is_file():
+                return FileResponse(
+                    target_path,
+                    filename=target_path.name,
+                    media_type="application/octet-stream",
+                )
+
+        # Generate filename with timestamp (time.strftime skips the
+        # datetime object allocation)
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"n8n_files_{timestamp}.zip"
 
         return StreamingResponse(
-            io.BytesIO(zip_buffer.getvalue()),
+            _zip_generator(selected_files, compression),
             media_type="application/zip",
             headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _scan_yt_files(yt_dir: Path) -> List[dict]:
+    """
+    Recursively collect file info from the yt folder (blocking filesystem calls).
+    Run this in a threadpool so large trees don't stall the event loop.
+    """
+    yt_dir_str = str(yt_dir)
+
+    # Recursively get all files in yt folder (DirEntry stat is cached).
+    # Only the raw byte count is returned - clients can divide; dropping the
+    # per-entry rounded floats cuts both CPU and payload size.
+    files = [
+        {
+            # Convert Windows paths to forward slash
+            "name": os.path.relpath(entry.path, yt_dir_str).replace("\\", "/"),
+            "size": entry.stat().st_size,
+        }
+        for entry in _walk_files(yt_dir)
+    ]
+
+    # Sort by name (C-level getter beats a lambda on large listings)
+    files.sort(key=itemgetter("name"))
+    return files
+
+
+@lru_cache(maxsize=128)
+def _yt_listing_bytes(path_str: str, dir_mtime_ns: int) -> "tuple[bytes, int]":
+    """
+    Scan the yt tree and serialize the listing once per directory version,
+    returning (body bytes, file count).
+
+    dir_mtime_ns is part of the cache key purely for invalidation: the
+    folder's mtime bumps whenever an entry is added or removed, so a
+    changed tree misses the cache and is rescanned. Nested-only edits
+    don't touch the top-level mtime, but every write path in this app
+    (upload/delete endpoints) lands in the top level.
+    """
+    files = _scan_yt_files(Path(path_str))
+    body = orjson.dumps(
+        {"status": "success", "total_files": len(files), "files": files}
+    )
+    return body, len(files)
+
+
 @app.get("/api/yt/files")
-async def list_yt_files():
+async def list_yt_files(request: Request):
     """List all files in yt folder and return as JSON"""
     try:
-        yt_dir = Path("yt")
+        yt_dir = YT_DIR
 
         if not yt_dir.exists():
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "status": "error",
                     "message": "yt folder not found",
@@ -400,51 +833,52 @@ async def list_yt_files():
                 status_code=404,
             )
 
-        files = []
-
-        # Recursively get all files in yt folder
-        for item in yt_dir.rglob("*"):
-            if item.is_file():
-                # Get relative path from yt folder
-                relative_path = str(item.relative_to(yt_dir))
-                size_bytes = item.stat().st_size
-
-                files.append(
-                    {
-                        # Convert Windows paths to forward slash
-                        "name": relative_path.replace("\\", "/"),
-                        "size": size_bytes,
-                        "size_kb": round(size_bytes / 1024, 2),
-                        "size_mb": round(size_bytes / 1024 / 1024, 2),
-                    }
-                )
-
-        # Sort by name
-        files.sort(key=lambda x: x["name"])
-
-        return JSONResponse(
-            content={"status": "success",
-                     "total_files": len(files), "files": files}
+        # Unchanged directories serve pre-serialized bytes - no rescan,
+        # no re-encode, just one stat on the folder itself
+        st = await run_in_threadpool(os.stat, yt_dir)
+        body, count = await run_in_threadpool(
+            _yt_listing_bytes, str(yt_dir), st.st_mtime_ns)
+
+        # Weak ETag from (mtime, count): pollers that already hold the
+        # current listing get an empty 304 instead of the full body
+        etag = f'W/"{st.st_mtime_ns:x}-{count:x}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
         )
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": str(e), "files": []}, status_code=500
         )
 
 
 @app.post("/api/yt/files")
-async def upload_file_to_yt(file: UploadFile = File(...)):
+async def upload_file_to_yt(request: Request, file: UploadFile = File(...)):
     """Upload a file to the yt folder"""
     try:
-        yt_dir = Path("yt")
+        # Reject oversized uploads before reading any of the body
+        content_length = request.headers.get("content-length")
+        if content_length and int(content_length) > MAX_UPLOAD_BYTES:
+            return ORJSONResponse(
+                content={
+                    "status": "error",
+                    "message": f"Upload exceeds {MAX_UPLOAD_BYTES // (1 << 30)} GB limit",
+                },
+                status_code=413,
+            )
+
+        yt_dir = YT_DIR
 
         # Create yt folder if it doesn't exist
         yt_dir.mkdir(exist_ok=True)
 
         # Validate filename
         if not file.filename:
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"status": "error", "message": "No filename provided"},
                 status_code=400,
             )
@@ -452,15 +886,15 @@ async def upload_file_to_yt(file: UploadFile = File(...)):
         # Create target file path
         target_path = yt_dir / file.filename
 
-        # Write file to disk
-        with open(target_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Stream to disk in 1 MiB chunks - never holds the whole upload
+        # in memory, and the async writes keep the event loop free
+        file_size = 0
+        async with aiofiles.open(target_path, "wb") as buffer:
+            while chunk := await file.read(1 << 20):
+                await buffer.write(chunk)
+                file_size += len(chunk)
 
-        # Get file info
-        file_size = target_path.stat().st_size
-
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "success",
                 "message": "File uploaded successfully",
@@ -475,7 +909,7 @@ async def upload_file_to_yt(file: UploadFile = File(...)):
         )
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": str(e)}, status_code=500
         )
 
@@ -484,19 +918,17 @@ async def upload_file_to_yt(file: UploadFile = File(...)):
 async def get_file_url(request: Request, filename: str):
     """Get the URL for a file in the yt folder"""
     try:
-        yt_dir = Path("yt")
-        target_path = yt_dir / filename
-        target_path = target_path.resolve()
-
-        # Security check - ensure path is within yt directory
-        if not str(target_path).startswith(str(yt_dir.resolve())):
-            return JSONResponse(
+        # Security check - string-normalized containment against the
+        # precomputed yt root, no realpath syscalls per request
+        target_path = _safe_join(YT_ROOT, filename)
+        if target_path is None:
+            return ORJSONResponse(
                 content={"status": "error", "message": "Access denied"}, status_code=403
             )
 
         # Check if file exists
         if not target_path.exists() or not target_path.is_file():
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"status": "error", "message": "File not found"},
                 status_code=404,
             )
@@ -508,7 +940,7 @@ async def get_file_url(request: Request, filename: str):
         # Get file info
         file_size = target_path.stat().st_size
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "success",
                 "file": {
@@ -522,7 +954,39 @@ async def get_file_url(request: Request, filename: str):
         )
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
+            content={"status": "error", "message": str(e)}, status_code=500
+        )
+
+
+@app.get("/yt-download/{filename:path}")
+async def download_file_from_yt(filename: str):
+    """Download a file from the yt folder"""
+    try:
+        # Security check - string-normalized containment against the
+        # precomputed yt root, no realpath syscalls per request
+        target_path = _safe_join(YT_ROOT, filename)
+        if target_path is None:
+            return ORJSONResponse(
+                content={"status": "error", "message": "Access denied"}, status_code=403
+            )
+
+        # Check if file exists
+        if not target_path.exists() or not target_path.is_file():
+            return ORJSONResponse(
+                content={"status": "error", "message": "File not found"},
+                status_code=404,
+            )
+
+        # FileResponse streams via sendfile(2) - bytes never enter Python
+        return FileResponse(
+            target_path,
+            filename=target_path.name,
+            media_type="application/octet-stream",
+        )
+
+    except Exception as e:
+        return ORJSONResponse(
             content={"status": "error", "message": str(e)}, status_code=500
         )
 
@@ -531,26 +995,24 @@ async def get_file_url(request: Request, filename: str):
 async def delete_file_from_yt(filename: str):
     """Delete a file from the yt folder"""
     try:
-        yt_dir = Path("yt")
-        target_path = yt_dir / filename
-        target_path = target_path.resolve()
-
-        # Security check - ensure path is within yt directory
-        if not str(target_path).startswith(str(yt_dir.resolve())):
-            return JSONResponse(
+        # Security check - string-normalized containment against the
+        # precomputed yt root, no realpath syscalls per request
+        target_path = _safe_join(YT_ROOT, filename)
+        if target_path is None:
+            return ORJSONResponse(
                 content={"status": "error", "message": "Access denied"}, status_code=403
             )
 
         # Check if file exists
         if not target_path.exists():
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"status": "error", "message": "File not found"},
                 status_code=404,
             )
 
         # Only delete files, not directories
         if not target_path.is_file():
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"status": "error",
                          "message": "Cannot delete directories"},
                 status_code=400,
@@ -559,7 +1021,7 @@ async def delete_file_from_yt(filename: str):
         # Delete the file
         target_path.unlink()
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "success",
                 "message": f"File '{filename}' deleted successfully",
@@ -567,13 +1029,15 @@ async def delete_file_from_yt(filename: str):
         )
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": str(e)}, status_code=500
         )
 
 
 @app.get("/api/files/yesterday")
-async def get_yesterday_files(date_now: Optional[str] = None):
+async def get_yesterday_files(
+    request: Request, date_now: Optional[str] = None, include_mtime: bool = True
+):
     """
     Get all files from n8n_ffmpeg folder from the last 24 hours.
 
@@ -582,6 +1046,7 @@ async def get_yesterday_files(date_now: Optional[str] = None):
 
     Args:
         date_now: Optional datetime string in format YYYY-MM-DD HH:MM:SS (defaults to now)
+        include_mtime: Set false to skip the per-file "modified" timestamp
 
     Returns:
         JSON response with list of files from the last 24 hours
@@ -601,7 +1066,7 @@ async def get_yesterday_files(date_now: Optional[str] = None):
                 try:
                     current_time = datetime.strptime(date_now, "%Y-%m-%d")
                 except ValueError:
-                    return JSONResponse(
+                    return ORJSONResponse(
                         content={
                             "status": "error",
                             "message": "Invalid date format. Use YYYY-MM-DD HH:MM:SS or YYYY-MM-DD",
@@ -615,13 +1080,9 @@ async def get_yesterday_files(date_now: Optional[str] = None):
         time_24h_ago = current_time - timedelta(hours=24, minutes=1)
         time_now_plus_buffer = current_time + timedelta(minutes=1)
 
-        # Pattern to match datetime in filename (YYYY-MM-DD_HH-MM-SS)
-        datetime_pattern = re.compile(
-            r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})")
-
         # Get all files from n8n_ffmpeg folder
         if not STATICFILES_DIR.exists():
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "status": "error",
                     "message": "n8n_ffmpeg folder not found",
@@ -630,51 +1091,18 @@ async def get_yesterday_files(date_now: Optional[str] = None):
                 status_code=404,
             )
 
-        files_24h = []
-
-        # Recursively search for files from the last 24 hours
-        for item in STATICFILES_DIR.rglob("*"):
-            if item.is_file():
-                # Extract datetime from filename
-                match = datetime_pattern.search(item.name)
-                if match:
-                    try:
-                        # Extract date and time from filename
-                        date_str = match.group(1)  # YYYY-MM-DD
-                        time_str = match.group(2)  # HH-MM-SS
-
-                        # Convert to datetime object
-                        file_datetime_str = f"{date_str} {time_str.replace('-', ':')}"
-                        file_datetime = datetime.strptime(
-                            file_datetime_str, "%Y-%m-%d %H:%M:%S")
-
-                        # Check if file is within the 24-hour window
-                        if time_24h_ago <= file_datetime <= time_now_plus_buffer:
-                            relative_path = str(
-                                item.relative_to(STATICFILES_DIR))
-                            file_size = item.stat().st_size
-
-                            files_24h.append(
-                                {
-                                    "name": item.name,
-                                    "path": relative_path.replace("\\", "/"),
-                                    "datetime": file_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                                    "size": file_size,
-                                    "size_kb": round(file_size / 1024, 2),
-                                    "size_mb": round(file_size / 1024 / 1024, 2),
-                                    "modified": datetime.fromtimestamp(
-                                        item.stat().st_mtime
-                                    ).strftime("%Y-%m-%d %H:%M:%S"),
-                                }
-                            )
-                    except ValueError:
-                        # Skip files with invalid datetime format
-                        continue
-
-        # Sort by filename
-        files_24h.sort(key=lambda x: x["name"])
-
-        return JSONResponse(
+        # Recursively search for files from the last 24 hours (scan off-loop)
+        files_24h = await run_in_threadpool(
+            _scan_yesterday, time_24h_ago, time_now_plus_buffer, include_mtime)
+
+        # Weak ETag from (tree mtime, count) - lets pollers skip the body
+        # when nothing under n8n_ffmpeg changed
+        root_st = await run_in_threadpool(os.stat, STATICFILES_DIR)
+        etag = f'W/"{root_st.st_mtime_ns:x}-{len(files_24h):x}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+
+        return ORJSONResponse(
             content={
                 "status": "success",
                 "current_time": current_time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -684,149 +1112,16 @@ async def get_yesterday_files(date_now: Optional[str] = None):
                 },
                 "total_files": len(files_24h),
                 "files": files_24h,
-            }
+            },
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
         )
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": str(e), "files": []}, status_code=500
         )
 
 
-# Thread pool for running ffmpeg in background
-executor = ThreadPoolExecutor(max_workers=2)
-
-
-def merge_videos_fast(video_files: List[Path], output_path: Path) -> dict:
-    """
-    SUPER FAST merge using codec copy (no re-encoding).
-
-    This is 10-50x faster than re-encoding but requires all videos to have:
-    - Same codec (e.g., all h264)
-    - Same resolution (e.g., all 1920x1080)
-    - Same frame rate (e.g., all 30fps)
-
-    If videos have different formats, this will fail and you should use merge_videos_sync instead.
-
-    Args:
-        video_files: List of video file paths to merge
-        output_path: Path where the merged video will be saved
-
-    Returns:
-        dict with status and message
-    """
-    try:
-        # Create a temporary file list for ffmpeg concat
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            concat_file = f.name
-            for video_file in video_files:
-                # Write absolute path with forward slashes
-                file_path = str(video_file.absolute()).replace("\\", "/")
-                f.write(f"file '{file_path}'\n")
-
-        try:
-            # Use concat demuxer with codec copy (no re-encoding) - VERY FAST!
-            (
-                ffmpeg.input(concat_file, format="concat", safe=0)
-                .output(
-                    str(output_path),
-                    c="copy",  # Copy codec - no re-encoding!
-                    loglevel="error",
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-
-            return {
-                "status": "success",
-                "message": f"Successfully merged {len(video_files)} videos (FAST mode - no re-encoding)",
-                "output_file": output_path.name,
-                "output_size": output_path.stat().st_size,
-                "output_size_mb": round(output_path.stat().st_size / 1024 / 1024, 2),
-            }
-
-        finally:
-            # Clean up temporary concat file
-            Path(concat_file).unlink(missing_ok=True)
-
-    except ffmpeg.Error as e:
-        error_message = e.stderr.decode() if e.stderr else str(e)
-        return {
-            "status": "error",
-            "message": f"FFmpeg fast merge error: {error_message}",
-        }
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {str(e)}"}
-
-
-def merge_videos_sync(video_files: List[Path], output_path: Path) -> dict:
-    """
-    Synchronous function to merge multiple video files using ffmpeg.
-    This will be run in a thread pool to avoid blocking the async event loop.
-
-    Args:
-        video_files: List of video file paths to merge
-        output_path: Path where the merged video will be saved
-
-    Returns:
-        dict with status and message
-    """
-    try:
-        # Create a temporary file list for ffmpeg concat
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            concat_file = f.name
-            for video_file in video_files:
-                # Write absolute path with forward slashes and escape special characters
-                file_path = str(video_file.absolute()).replace("\\", "/")
-                f.write(f"file '{file_path}'\n")
-
-        try:
-            # Use ffmpeg to merge and convert videos to 1920x1080 landscape
-            # Scale vertical videos (1080x1920) to horizontal (1920x1080) with black bars
-            # Using 'ultrafast' preset for much faster encoding (important when merging many videos)
-            (
-                ffmpeg.input(concat_file, format="concat", safe=0)
-                .output(
-                    str(output_path),
-                    vf="scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2:black",
-                    # Video codec settings
-                    vcodec="libx264",
-                    # Encoding speed (ultrafast = fastest encoding, larger file size)
-                    preset="ultrafast",
-                    crf=23,  # Quality (18-28, lower = better quality)
-                    # Audio codec settings
-                    acodec="aac",
-                    audio_bitrate="128k",
-                    # Other settings
-                    loglevel="error",
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-
-            return {
-                "status": "success",
-                "message": f"Successfully merged {len(video_files)} videos",
-                "output_file": output_path.name,
-                "output_size": output_path.stat().st_size,
-                "output_size_mb": round(output_path.stat().st_size / 1024 / 1024, 2),
-            }
-
-        finally:
-            # Clean up temporary concat file
-            Path(concat_file).unlink(missing_ok=True)
-
-    except ffmpeg.Error as e:
-        error_message = e.stderr.decode() if e.stderr else str(e)
-        return {"status": "error", "message": f"FFmpeg error: {error_message}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {str(e)}"}
-
-
 @app.get("/api/files/merge-today")
 async def merge_today_videos(date_now: Optional[str] = None):
     """
@@ -856,7 +1151,7 @@ async def merge_today_videos(date_now: Optional[str] = None):
                 try:
                     current_time = datetime.strptime(date_now, "%Y-%m-%d")
                 except ValueError:
-                    return JSONResponse(
+                    return ORJSONResponse(
                         content={
                             "status": "error",
                             "message": "Invalid date format. Use YYYY-MM-DD HH:MM:SS or YYYY-MM-DD",
@@ -866,85 +1161,15 @@ async def merge_today_videos(date_now: Optional[str] = None):
         else:
             current_time = datetime.now()
 
-        # Calculate 24 hours ago (with 1 minute buffer on each side)
-        time_24h_ago = current_time - timedelta(hours=24, minutes=1)
-        time_now_plus_buffer = current_time + timedelta(minutes=1)
-
-        # Pattern to match datetime in filename (YYYY-MM-DD_HH-MM-SS)
-        datetime_pattern = re.compile(
-            r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})")
-
-        # Get all video files from the last 24 hours
-        if not STATICFILES_DIR.exists():
-            return JSONResponse(
-                content={"status": "error",
-                         "message": "n8n_ffmpeg folder not found"},
-                status_code=404,
-            )
-
-        video_files = []
-        video_extensions = {".mp4", ".avi", ".mov",
-                            ".mkv", ".flv", ".wmv", ".webm"}
-
-        # Find all video files from the last 24 hours
-        for item in STATICFILES_DIR.rglob("*"):
-            if item.is_file() and item.suffix.lower() in video_extensions:
-                match = datetime_pattern.search(item.name)
-                if match:
-                    try:
-                        # Extract date and time from filename
-                        date_str = match.group(1)  # YYYY-MM-DD
-                        time_str = match.group(2)  # HH-MM-SS
-
-                        # Convert to datetime object
-                        file_datetime_str = f"{date_str} {time_str.replace('-', ':')}"
-                        file_datetime = datetime.strptime(
-                            file_datetime_str, "%Y-%m-%d %H:%M:%S")
-
-                        # Check if file is within the 24-hour window
-                        if time_24h_ago <= file_datetime <= time_now_plus_buffer:
-                            video_files.append(item)
-                    except ValueError:
-                        # Skip files with invalid datetime format
-                        continue
-
-        if not video_files:
-            return JSONResponse(
-                content={
-                    "status": "error",
-                    "message": f"No video files found for the last 24 hours (from {time_24h_ago.strftime('%Y-%m-%d %H:%M:%S')} to {time_now_plus_buffer.strftime('%Y-%m-%d %H:%M:%S')})",
-                },
-                status_code=404,
-            )
-
-        # Sort files by name to ensure consistent order
-        video_files.sort(key=lambda x: x.name)
-
-        output_filename = f"hotnews_{current_time.strftime('%Y-%m-%d')}.mp4"
-        output_path = STATICFILES_DIR / output_filename
-
-        # Try FAST merge first (codec copy - no re-encoding)
-        # This is 10-50x faster but only works if all videos have same format
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            executor, merge_videos_fast, video_files, output_path
-        )
-
-        # If fast merge failed, fall back to slow merge with re-encoding
-        if result["status"] == "error":
-            result = await loop.run_in_executor(
-                executor, merge_videos_sync, video_files, output_path
-            )
+        result = await _merge_last_24h(current_time)
 
         if result["status"] == "success":
-            return JSONResponse(
+            video_files = result["video_files"]
+            return ORJSONResponse(
                 content={
                     "status": "success",
                     "message": result["message"],
-                    "time_range": {
-                        "from": time_24h_ago.strftime('%Y-%m-%d %H:%M:%S'),
-                        "to": time_now_plus_buffer.strftime('%Y-%m-%d %H:%M:%S'),
-                    },
+                    "time_range": result["time_range"],
                     "input_files": [f.name for f in video_files],
                     "total_input_files": len(video_files),
                     "output_file": result["output_file"],
@@ -954,12 +1179,12 @@ async def merge_today_videos(date_now: Optional[str] = None):
                 }
             )
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"status": "error", "message": result["message"]},
-                status_code=500,
+                status_code=404 if result.get("not_found") else 500,
             )
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": str(e)}, status_code=500
         )
@@ -1,7 +1,290 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List
-import tempfile
-import ffmpeg
+from typing import List, Optional
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+# House output format: 1920x1080 landscape, vertical inputs padded with
+# black bars
+TARGET_WIDTH = 1920
+TARGET_HEIGHT = 1080
+TARGET_VF = (
+    "scale=1920:1080:force_original_aspect_ratio=decrease,"
+    "pad=1920:1080:(ow-iw)/2:(oh-ih)/2:black"
+)
+
+# The commands are fixed-shape, so argv lists are built directly instead
+# of going through ffmpeg-python's per-call graph construction. These are
+# the common prefixes.
+_FFMPEG_BASE = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+_CONCAT_INPUT = [
+    "-f", "concat", "-safe", "0",
+    "-protocol_whitelist", "file,pipe",
+    "-thread_queue_size", "1024",
+    "-i", "pipe:",
+]
+_ENCODE_ARGS = [
+    "-vf", TARGET_VF,
+    # Video codec settings: 'veryfast' encodes nearly as quickly as
+    # 'ultrafast' but produces files 2-3x smaller; crf 23 is the
+    # quality knob (18-28, lower = better quality)
+    "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+    # Pinned so normalized outliers match the copy gate's signature
+    "-pix_fmt", "yuv420p",
+    # Audio codec settings
+    "-c:a", "aac", "-b:a", "128k",
+]
+
+
+class FFmpegError(Exception):
+    """Raised when an ffmpeg/ffprobe invocation exits nonzero."""
+
+    def __init__(self, cmd: str, stderr: bytes):
+        super().__init__(f"{cmd} exited with an error")
+        self.stderr = stderr
+
+
+def _concat_list_bytes(
+    video_files: List[Path],
+    durations: Optional[List[Optional[float]]] = None,
+) -> bytes:
+    """
+    Build the concat-demuxer file list in memory, ready to feed ffmpeg
+    over stdin. No temp file on disk, nothing to clean up, nothing
+    leaked if the process is killed mid-merge.
+
+    When durations are supplied (from the probe cache), each file gets a
+    "duration" directive so the demuxer can skip re-probing the input's
+    length - noticeable on long segment lists.
+    """
+    # One getcwd for the whole list - Path.absolute() would redo it per file.
+    # Assembled as bytes (fsencode) so huge segment lists skip a per-line
+    # str build plus one whole-blob UTF-8 encode.
+    cwd = os.fsencode(os.getcwd()) + b"/"
+    chunks = [b"ffconcat version 1.0\n"]
+    for i, video_file in enumerate(video_files):
+        # Absolute path with forward slashes
+        posix = os.fsencode(video_file.as_posix())
+        if not video_file.is_absolute():
+            posix = cwd + posix
+        # Quote per the concat demuxer spec: ' -> '\'' - an unescaped
+        # quote in a filename would abort the copy merge and push the
+        # whole batch down the re-encode fallback
+        posix = posix.replace(b"'", b"'\\''")
+        # Explicit file: protocol - the demuxer resolves entries relative
+        # to the list's own URL, and this list arrives over pipe:, which
+        # would otherwise mangle every path into pipe:/...
+        chunks.append(b"file 'file:" + posix + b"'\n")
+        if durations is not None and durations[i] is not None:
+            chunks.append(b"duration %.6f\n" % durations[i])
+    return b"".join(chunks)
+
+
+@lru_cache(maxsize=256)
+def _probe_meta_cached(
+    path_str: str, mtime_ns: int, size: int
+) -> Optional[tuple]:
+    """
+    Probe the first video stream and reduce it to (compatibility
+    signature, duration seconds). mtime_ns and size are cache-key-only:
+    daily merges re-probe a file only after it actually changes on disk.
+    """
+    try:
+        proc = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_streams", "-show_format", "-of", "json", path_str],
+            capture_output=True,
+        )
+    except OSError:
+        return None
+    if proc.returncode != 0:
+        return None
+    try:
+        info = json.loads(proc.stdout)
+        stream = info["streams"][0]
+    except (ValueError, KeyError, IndexError):
+        return None
+    # Only fields codec copy actually requires. Frame rate and time base
+    # are deliberately absent: the concat demuxer tolerates variance in
+    # both, and gating on them would push fps-mixed batches (which copy
+    # handles fine) into a pointless full re-encode.
+    sig = (
+        stream.get("codec_name"),
+        stream.get("width"),
+        stream.get("height"),
+        stream.get("pix_fmt"),
+    )
+    duration = stream.get("duration") or info.get("format", {}).get("duration")
+    try:
+        duration = float(duration) if duration is not None else None
+    except ValueError:
+        duration = None
+    return sig, duration
+
+
+# Signature persisted on the inode so repeated merges skip ffprobe even
+# across process restarts
+_COMPAT_XATTR = "user.n8ncleaner.compat"
+
+
+def _probe_meta(path: Path) -> Optional[tuple]:
+    """(signature, duration) for a file, or None if it can't be probed."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    # A getxattr costs microseconds against a multi-ms ffprobe spawn.
+    # The stored mtime_ns invalidates the value if the file changed.
+    try:
+        cached = json.loads(os.getxattr(path, _COMPAT_XATTR))
+        # The length check invalidates signatures persisted by older
+        # builds that probed a different field set
+        if cached["mtime_ns"] == st.st_mtime_ns and len(cached["sig"]) == 4:
+            return tuple(cached["sig"]), cached["dur"]
+    except (AttributeError, OSError, ValueError, KeyError, TypeError):
+        pass
+
+    meta = _probe_meta_cached(str(path), st.st_mtime_ns, st.st_size)
+
+    # Best-effort persist; filesystems without user xattrs (FAT, some
+    # network mounts) just keep hitting the in-process lru_cache.
+    # Probe failures are not persisted - the file may be mid-write.
+    if meta is not None:
+        try:
+            os.setxattr(
+                path,
+                _COMPAT_XATTR,
+                json.dumps(
+                    {"mtime_ns": st.st_mtime_ns,
+                     "sig": meta[0], "dur": meta[1]}).encode(),
+            )
+        except (AttributeError, OSError):
+            pass
+    return meta
+
+
+def _probe_compat(path: Path) -> Optional[tuple]:
+    """Compatibility signature for a file, or None if it can't be probed."""
+    meta = _probe_meta(path)
+    return meta[0] if meta is not None else None
+
+
+def _probe_duration(path: Path) -> Optional[float]:
+    """Duration in seconds from the probe cache, or None if unknown."""
+    meta = _probe_meta(path)
+    return meta[1] if meta is not None else None
+
+
+# Keep only the tail of ffmpeg's stderr - plenty for error reporting
+# without buffering an unbounded log in memory on long runs
+_STDERR_RING_LINES = 200
+
+
+def _run_ffmpeg(args: List[str], input_bytes: Optional[bytes] = None) -> None:
+    """
+    Run an ffmpeg argv with stdout discarded and stderr drained into a
+    bounded ring buffer on a side thread. Keeps RSS flat on long merges
+    and removes the capture-pipe deadlock mode of buffering whole child
+    streams in Python.
+
+    Raises FFmpegError carrying the stderr tail on nonzero exit.
+    """
+    proc = subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE if input_bytes is not None else subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    ring: deque = deque(maxlen=_STDERR_RING_LINES)
+    drainer = threading.Thread(
+        target=lambda: ring.extend(iter(proc.stderr.readline, b"")),
+        daemon=True,
+    )
+    drainer.start()
+    if input_bytes is not None:
+        proc.stdin.write(input_bytes)
+        proc.stdin.close()
+    returncode = proc.wait()
+    drainer.join()
+    if returncode != 0:
+        raise FFmpegError("ffmpeg", b"".join(ring))
+
+
+def _worker_count(n_tasks: int) -> int:
+    """
+    Parallel ffmpeg workers: half the cores this process may actually use.
+    sched_getaffinity respects container/cgroup CPU masks where cpu_count
+    reports the whole host.
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 2
+    return min(n_tasks, max(1, cores // 2))
+
+
+def _fadvise_inputs(video_files: List[Path]) -> None:
+    """
+    Tell the kernel each input is about to be read once, front to back:
+    WILLNEED kicks off readahead into the page cache before ffmpeg (or
+    sendfile) even opens the file. Purely advisory; errors are ignored.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for video_file in video_files:
+        try:
+            fd = os.open(video_file, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _sendfile_concat(video_files: List[Path], out_path: Path) -> None:
+    """
+    Byte-level concat via os.sendfile - pages move kernel-to-kernel with
+    no user-space copy and no ffmpeg process. Only valid for MPEG-TS,
+    which is designed to concatenate at the byte level.
+    """
+    with open(out_path, "wb") as dst:
+        out_fd = dst.fileno()
+
+        # Reserve the full output up front - one extent allocation
+        # instead of extent-tree churn on every sendfile chunk
+        if hasattr(os, "posix_fallocate"):
+            try:
+                total = sum(v.stat().st_size for v in video_files)
+                if total:
+                    os.posix_fallocate(out_fd, 0, total)
+            except OSError:
+                pass
+
+        for video_file in video_files:
+            with open(video_file, "rb") as src:
+                src_fd = src.fileno()
+                try:
+                    os.posix_fadvise(
+                        src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except (AttributeError, OSError):
+                    pass
+                size = os.fstat(src_fd).st_size
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(out_fd, src_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
 
 
 def merge_videos_fast(video_files: List[Path], output_path: Path) -> dict:
@@ -22,47 +305,334 @@ def merge_videos_fast(video_files: List[Path], output_path: Path) -> dict:
     Returns:
         dict with status and message
     """
-    try:
-        # Create a temporary file list for ffmpeg concat
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            concat_file = f.name
-            for video_file in video_files:
-                # Write absolute path with forward slashes
-                file_path = str(video_file.absolute()).replace("\\", "/")
-                f.write(f"file '{file_path}'\n")
+    if not video_files:
+        return {"status": "error", "message": "No video files to merge"}
 
+    # Stage next to the final path so publishing is one atomic rename -
+    # readers never see a half-written hotnews file
+    tmp_out = output_path.with_suffix(output_path.suffix + ".part")
+
+    # A single input already in the output container needs no merge at
+    # all: hardlink it into place (copy if the source sits on another
+    # filesystem) and skip ffmpeg entirely. Other containers fall
+    # through to the normal concat path, which remuxes to real MP4.
+    if (
+        len(video_files) == 1
+        and video_files[0].suffix.lower() == output_path.suffix.lower()
+    ):
         try:
-            # Use concat demuxer with codec copy (no re-encoding) - VERY FAST!
-            (
-                ffmpeg.input(concat_file, format="concat", safe=0)
-                .output(
-                    str(output_path),
-                    c="copy",  # Copy codec - no re-encoding!
-                    loglevel="error",
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
+            tmp_out.unlink(missing_ok=True)
+            try:
+                os.link(video_files[0], tmp_out)
+            except OSError:
+                shutil.copyfile(video_files[0], tmp_out)
+            os.replace(tmp_out, output_path)
+        except OSError as e:
+            tmp_out.unlink(missing_ok=True)
+            return {"status": "error", "message": f"Failed to link single video: {e}"}
+        size = output_path.stat().st_size
+        return {
+            "status": "success",
+            "message": "Single video - linked into place, no merge needed",
+            "output_file": output_path.name,
+            "output_size": size,
+            "output_size_mb": round(size / (1 << 20), 2),
+        }
+
+    try:
+        # Pre-flight: one cached ffprobe per input catches codec,
+        # resolution or timebase mismatches up front, instead of paying
+        # for a full ffmpeg spawn plus a partial mux that errors out
+        signatures = {_probe_compat(v) for v in video_files}
+        if None in signatures:
+            # A None signature is a probe failure (ffprobe missing, file
+            # mid-write) - a different problem than mismatched streams
+            unprobed = sum(1 for v in video_files if _probe_compat(v) is None)
+            return {
+                "status": "error",
+                "message": (
+                    f"Could not probe {unprobed} of {len(video_files)} "
+                    "input videos"
+                ),
+            }
+        if len(signatures) > 1:
+            return {
+                "status": "error",
+                "message": (
+                    "Inputs are not uniform enough for codec copy "
+                    f"({len(signatures)} distinct stream signatures)"
+                ),
+            }
 
+        # Uniform MPEG-TS inputs concatenate at the byte level: stream
+        # them through sendfile and skip the ffmpeg process entirely
+        if hasattr(os, "sendfile") and all(
+            v.suffix.lower() == ".ts" for v in video_files
+        ):
+            _sendfile_concat(video_files, tmp_out)
+            os.replace(tmp_out, output_path)
+            size = output_path.stat().st_size
             return {
                 "status": "success",
-                "message": f"Successfully merged {len(video_files)} videos (FAST mode - no re-encoding)",
+                "message": f"Successfully merged {len(video_files)} videos (TS byte concat - zero copy)",
                 "output_file": output_path.name,
-                "output_size": output_path.stat().st_size,
-                "output_size_mb": round(output_path.stat().st_size / 1024 / 1024, 2),
+                "output_size": size,
+                "output_size_mb": round(size / (1 << 20), 2),
             }
 
-        finally:
-            # Clean up temporary concat file
-            Path(concat_file).unlink(missing_ok=True)
+        # Prime the page cache for the sequential read ffmpeg is about
+        # to do on every input
+        _fadvise_inputs(video_files)
+
+        # Use concat demuxer with codec copy (no re-encoding) - VERY FAST!
+        # The file list arrives over stdin, so there is no temp file to
+        # write, unlink, or leak; a larger thread_queue_size keeps the
+        # muxer fed
+        _run_ffmpeg(
+            _FFMPEG_BASE + _CONCAT_INPUT + [
+                "-c", "copy",  # Copy codec - no re-encoding!
+                "-movflags", "+faststart",
+                # Explicit muxer - the .part staging suffix defeats
+                # ffmpeg's extension-based container guess
+                "-f", "mp4", str(tmp_out),
+            ],
+            # Duration hints come straight from the probe cache the
+            # pre-flight just filled, so the demuxer skips re-probing
+            _concat_list_bytes(
+                video_files, [_probe_duration(v) for v in video_files]),
+        )
+        os.replace(tmp_out, output_path)
+
+        size = output_path.stat().st_size
+        return {
+            "status": "success",
+            "message": f"Successfully merged {len(video_files)} videos (FAST mode - no re-encoding)",
+            "output_file": output_path.name,
+            "output_size": size,
+            "output_size_mb": round(size / (1 << 20), 2),
+        }
 
-    except ffmpeg.Error as e:
+    except FFmpegError as e:
+        tmp_out.unlink(missing_ok=True)
         error_message = e.stderr.decode() if e.stderr else str(e)
         return {
             "status": "error",
             "message": f"FFmpeg fast merge error: {error_message}",
         }
+    except Exception as e:
+        tmp_out.unlink(missing_ok=True)
+        return {"status": "error", "message": f"Unexpected error: {str(e)}"}
+
+
+def merge_videos_fast_to_pipe(video_files: List[Path]) -> subprocess.Popen:
+    """
+    Start a codec-copy concat that streams MPEG-TS to the returned
+    process's stdout, for pipelines that consume the merge immediately
+    instead of writing it to disk and reading it back. The caller owns
+    the process: read proc.stdout to EOF, then proc.wait().
+
+    merge_videos_fast remains the default, file-writing variant.
+    """
+    _fadvise_inputs(video_files)
+    proc = subprocess.Popen(
+        _FFMPEG_BASE + _CONCAT_INPUT + [
+            "-c", "copy", "-f", "mpegts", "pipe:1",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    # The list is tiny - it fits the pipe buffer, so this never blocks
+    proc.stdin.write(_concat_list_bytes(video_files))
+    proc.stdin.close()
+    return proc
+
+
+def merge_videos_fast_multi(
+    video_files: List[Path], outputs: List[Path]
+) -> dict:
+    """
+    Codec-copy concat written to several destinations in one pass via
+    ffmpeg's tee muxer, so the inputs are read once no matter how many
+    targets there are. The container for each target is inferred from
+    its suffix (.ts -> mpegts, everything else -> faststart mp4).
+    """
+    try:
+        def tee_slice(p: Path) -> str:
+            if p.suffix.lower() == ".ts":
+                return f"[f=mpegts]{p.as_posix()}"
+            return f"[f=mp4:movflags=+faststart]{p.as_posix()}"
+
+        _fadvise_inputs(video_files)
+        _run_ffmpeg(
+            _FFMPEG_BASE + _CONCAT_INPUT + [
+                "-c", "copy", "-map", "0", "-f", "tee",
+                "|".join(tee_slice(p) for p in outputs),
+            ],
+            _concat_list_bytes(video_files),
+        )
+
+        return {
+            "status": "success",
+            "message": (
+                f"Successfully merged {len(video_files)} videos into "
+                f"{len(outputs)} outputs (tee - single pass)"
+            ),
+            "outputs": {p.name: p.stat().st_size for p in outputs},
+        }
+
+    except FFmpegError as e:
+        error_message = e.stderr.decode() if e.stderr else str(e)
+        return {"status": "error", "message": f"FFmpeg tee merge error: {error_message}"}
+    except Exception as e:
+        return {"status": "error", "message": f"Unexpected error: {str(e)}"}
+
+
+def _needs_normalize(path: Path) -> bool:
+    """
+    True if the file is not already h264/yuv420p at the target resolution,
+    i.e. it would fail the copy gate even after the others are normalized.
+
+    Reads the compatibility signature cached by the fast-path pre-flight,
+    so the fallback never re-probes files the fast path just looked at.
+    """
+    sig = _probe_compat(path)
+    if sig is None:
+        return True
+    codec_name, width, height, pix_fmt = sig
+    return (
+        codec_name != "h264"
+        or width != TARGET_WIDTH
+        or height != TARGET_HEIGHT
+        or pix_fmt != "yuv420p"
+    )
+
+
+def _normalize_video(video_file: Path, tmp_path: Path) -> None:
+    """Re-encode a single outlier to 1920x1080 landscape h264/aac."""
+    _run_ffmpeg(
+        _FFMPEG_BASE + ["-i", str(video_file)] + _ENCODE_ARGS + [
+            "-f", "mp4", str(tmp_path),
+        ]
+    )
+
+
+def _merge_reencode_all(video_files: List[Path], output_path: Path) -> dict:
+    """
+    Last-resort merge: decode, scale/pad and re-encode the whole timeline
+    in one pass. Only used when the per-file normalization path fails.
+    """
+    # Same atomic publish as the fast path: encode to .part, rename once
+    tmp_out = output_path.with_suffix(output_path.suffix + ".part")
+    try:
+        # Merge and convert videos to 1920x1080 landscape; vertical
+        # inputs (1080x1920) are padded with black bars by TARGET_VF
+        _run_ffmpeg(
+            # Explicit muxer: ffmpeg can't guess a container from the
+            # .part staging suffix
+            _FFMPEG_BASE + _CONCAT_INPUT + _ENCODE_ARGS + [
+                "-f", "mp4", str(tmp_out)],
+            _concat_list_bytes(video_files),
+        )
+        os.replace(tmp_out, output_path)
+
+        size = output_path.stat().st_size
+        return {
+            "status": "success",
+            "message": f"Successfully merged {len(video_files)} videos",
+            "output_file": output_path.name,
+            "output_size": size,
+            "output_size_mb": round(size / (1 << 20), 2),
+        }
+
+    except FFmpegError as e:
+        tmp_out.unlink(missing_ok=True)
+        error_message = e.stderr.decode() if e.stderr else str(e)
+        return {"status": "error", "message": f"FFmpeg error: {error_message}"}
+    except Exception as e:
+        tmp_out.unlink(missing_ok=True)
+        return {"status": "error", "message": f"Unexpected error: {str(e)}"}
+
+
+def merge_videos_sync(video_files: List[Path], output_path: Path) -> dict:
+    """
+    Merge videos that are not uniform enough for a plain codec copy.
+
+    Instead of re-encoding the whole timeline, probe each input and
+    re-encode ONLY the outliers (wrong codec or resolution) to the target
+    1920x1080 format, in parallel, then concat everything with codec copy.
+    For a typical daily batch this turns an N-file transcode into a few
+    per-file transcodes plus one fast remux.
+
+    This will be run in a thread pool to avoid blocking the async event loop.
+
+    Args:
+        video_files: List of video file paths to merge
+        output_path: Path where the merged video will be saved
+
+    Returns:
+        dict with status and message
+    """
+    tmp_files: List[Path] = []
+    try:
+        # Sweep temps leaked by an earlier SIGKILLed merge. ffmpeg needs
+        # real output paths, so O_TMPFILE-style auto-vanishing inodes
+        # aren't an option here; a sweep under the merge lock is. Only
+        # temps whose embedded owner pid is dead (or our own) are fair
+        # game - another worker sharing the directory may be mid-encode.
+        for stale in output_path.parent.glob(".normalize_*"):
+            try:
+                owner = int(stale.name.split("_")[1])
+            except (IndexError, ValueError):
+                continue
+            if owner != os.getpid():
+                try:
+                    os.kill(owner, 0)
+                except ProcessLookupError:
+                    pass  # Owner is gone - the temp really is stale
+                except OSError:
+                    continue
+                else:
+                    continue
+            stale.unlink(missing_ok=True)
+
+        outliers = [v for v in video_files if _needs_normalize(v)]
+
+        # Pre-pass: normalize only the outliers, in parallel - each ffmpeg
+        # is its own process, so concurrent encodes use all cores
+        normalized = {}
+        if outliers:
+            pid = os.getpid()
+            for video_file in outliers:
+                tmp_path = output_path.parent / \
+                    f".normalize_{pid}_{len(tmp_files)}_{video_file.stem}.mp4"
+                tmp_files.append(tmp_path)
+                normalized[video_file] = tmp_path
+
+            with ThreadPoolExecutor(max_workers=_worker_count(len(outliers))) as pool:
+                list(pool.map(
+                    lambda v: _normalize_video(v, normalized[v]), outliers))
+
+        # All inputs are now uniform - finish with a codec-copy concat
+        final_list = [normalized.get(v, v) for v in video_files]
+        result = merge_videos_fast(final_list, output_path)
+
+        if result["status"] == "success":
+            result["message"] = (
+                f"Successfully merged {len(video_files)} videos "
+                f"({len(outliers)} re-encoded, rest copied)"
+            )
+            return result
+
+        # Copy still failed (e.g. mismatched frame rates) - re-encode all
+        return _merge_reencode_all(video_files, output_path)
+
+    except FFmpegError as e:
+        error_message = e.stderr.decode() if e.stderr else str(e)
+        return {"status": "error", "message": f"FFmpeg error: {error_message}"}
     except Exception as e:
         return {"status": "error", "message": f"Unexpected error: {str(e)}"}
+    finally:
+        # Clean up normalized temp files
+        for tmp_path in tmp_files:
+            tmp_path.unlink(missing_ok=True)